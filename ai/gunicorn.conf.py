@@ -0,0 +1,73 @@
+"""
+Gunicorn configuration for the AI service
+
+    gunicorn -c gunicorn.conf.py main:app
+
+CPU deployments run 2 * cores + 1 Uvicorn workers, counting only the cores
+the container may use, that share model weights loaded once in the master. GPU deployments should set WEB_CONCURRENCY=1 and
+rely on the in-process detection batcher; the app is not preloaded there,
+since CUDA cannot be initialised before fork, and each worker loads its
+models at startup.
+"""
+
+import math
+import os
+from pathlib import Path
+
+# Answer torch.cuda.is_available() through NVML so probing for a GPU, here
+# and when main.py is imported, does not initialise CUDA in the master
+os.environ.setdefault("PYTORCH_NVML_BASED_CUDA_CHECK", "1")
+
+import torch
+
+USE_GPU = torch.cuda.is_available()
+
+
+def available_cpus() -> int:
+    """
+    CPUs this process may use: its affinity mask, capped by the cgroup CPU
+    quota. multiprocessing.cpu_count() reports every host core, which
+    oversizes the worker pool in a CPU-limited container.
+    """
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    
+    quota = None
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        limit, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if limit != "max":
+            quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            # cgroup v1: a quota of -1 means unlimited
+            limit = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_quota_us").read_text())
+            period = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_period_us").read_text())
+            if limit > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+    
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(1, cpus)
+
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", 2 * available_cpus() + 1))
+
+# GPU workers build, compile and warm every model in the startup hook before
+# they can heartbeat, which takes far longer than serving a request
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 900 if USE_GPU else 120))
+graceful_timeout = 30
+
+# Import the app, and load the models, in the master before forking. Only
+# safe on CPU: forking after CUDA is initialised breaks it in the workers.
+preload_app = not USE_GPU
+if preload_app:
+    os.environ.setdefault("PRELOAD_MODELS", "1")
+
+
+def post_fork(server, worker):
+    # Avoid oversubscribing cores with one intra-op thread pool per worker
+    torch.set_num_threads(int(os.getenv("TORCH_NUM_THREADS", "1")))
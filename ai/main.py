@@ -1,13 +1,77 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+import asyncio
+import logging
+import os
+from fastapi import FastAPI, File, UploadFile, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
 import numpy as np
 import torch
 import cv2
+from torchvision.io import ImageReadMode, decode_jpeg
 from pathlib import Path
 import json
 
+from models.ai_models import ModelFactory
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+logger = logging.getLogger(__name__)
+
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB
+    jpeg_decoder = TurboJPEG()
+except (ImportError, RuntimeError, OSError):  # Optional: needs libturbojpeg
+    jpeg_decoder = None
+
+DEVICE = 'cuda' if torch.cuda.is_available() else 'cpu'
+MODEL_TYPES = ['detector', 'segmentation', 'change_detection', 'timeseries', 'feature_extractor']
+
+# int8 quantization for CPU deployments (ignored on GPU)
+QUANTIZE_CPU = os.getenv('QUANTIZE_CPU', '0') == '1'
+QUANTIZABLE_MODELS = {'detector', 'segmentation', 'feature_extractor'}
+# Sample tiles used to calibrate static int8 activation ranges; without
+# them segmentation and feature extraction stay in float
+QUANTIZE_CALIBRATION_DIR = os.getenv('QUANTIZE_CALIBRATION_DIR', '')
+STATIC_QUANTIZED_MODELS = {'segmentation', 'feature_extractor'}
+MAX_CALIBRATION_TILES = 32
+
+# Batch sizes to compile shape-specialized segmentation/feature variants for
+COMPILE_BATCH_SIZES = [int(b) for b in os.getenv('COMPILE_BATCH_SIZES', '').split(',') if b]
+COMPILABLE_MODELS = {'segmentation', 'feature_extractor'}
+
+# Load models in the gunicorn master (see gunicorn.conf.py), CPU only
+PRELOAD_MODELS = os.getenv('PRELOAD_MODELS', '0') == '1' and DEVICE == 'cpu'
+
+# Optional cap on uploaded image size, enforced while the body streams in
+# (unset: no limit)
+MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_BYTES', '0')) or None
+# Upload buffers are sized from Content-Length up to this, then grow
+MAX_PREALLOCATED_UPLOAD = 256 << 20
+
+# OpenAPI schema for endpoints that parse their multipart body themselves
+IMAGE_UPLOAD_OPENAPI = {
+    'requestBody': {
+        'required': True,
+        'content': {
+            'multipart/form-data': {
+                'schema': {
+                    'type': 'object',
+                    'required': ['image'],
+                    'properties': {'image': {'type': 'string', 'format': 'binary'}}
+                }
+            }
+        }
+    }
+}
+
+# Dynamic batching for object detection
+MAX_BATCH = 8
+MAX_WAIT_MS = 10
+
 app = FastAPI(
     title="Geospatial AI Service",
     description="AI/ML microservice for geospatial data analysis",
@@ -36,29 +100,277 @@ class ChangeDetectionResult(BaseModel):
     geometry: dict
     area: float
 
+async def stream_upload(request: Request, field: str) -> bytearray:
+    """
+    Parse a multipart/form-data body as it arrives and collect one file
+    field into a single writable buffer.
+    
+    Starlette's UploadFile only reaches the handler after the whole body has
+    been spooled to a temporary file, which is then read back into memory.
+    Streaming skips that spool and second copy, and an upload over
+    MAX_UPLOAD_BYTES is rejected as soon as it crosses the cap. The decoders
+    need the complete image, so the buffer still holds the whole file.
+    """
+    content_type, params = parse_options_header(request.headers.get('content-type', ''))
+    boundary = params.get(b'boundary')
+    if content_type != b'multipart/form-data' or not boundary:
+        raise HTTPException(status_code=415, detail="Expected a multipart/form-data upload")
+    
+    # Content-Length bounds the file size, so size the buffer once; the
+    # header is client-supplied, so never allocate past the limits up front
+    content_length = int(request.headers.get('content-length') or 0)
+    buffer = bytearray(min(content_length, MAX_UPLOAD_BYTES or MAX_PREALLOCATED_UPLOAD))
+    state = {'offset': 0, 'found': False, 'in_field': False, 'too_large': False}
+    headers = {}
+    header = []
+    
+    def on_part_begin():
+        headers.clear()
+    
+    def on_header_field(data, start, end):
+        header.append(bytes(data[start:end]))
+    
+    def on_header_value(data, start, end):
+        headers.setdefault(b''.join(header).lower(), bytearray()).extend(data[start:end])
+        header.clear()
+    
+    def on_headers_finished():
+        _, options = parse_options_header(bytes(headers.get(b'content-disposition', b'')))
+        state['in_field'] = not state['found'] and options.get(b'name') == field.encode()
+        state['found'] = state['found'] or state['in_field']
+    
+    def on_part_data(data, start, end):
+        if not state['in_field'] or state['too_large']:
+            return
+        offset = state['offset']
+        new_offset = offset + end - start
+        if MAX_UPLOAD_BYTES is not None and new_offset > MAX_UPLOAD_BYTES:
+            state['too_large'] = True
+            return
+        # Overwrites the preallocated bytes, or appends past them
+        buffer[offset:new_offset] = data[start:end]
+        state['offset'] = new_offset
+    
+    def on_part_end():
+        state['in_field'] = False
+    
+    parser = MultipartParser(boundary, {
+        'on_part_begin': on_part_begin,
+        'on_header_field': on_header_field,
+        'on_header_value': on_header_value,
+        'on_headers_finished': on_headers_finished,
+        'on_part_data': on_part_data,
+        'on_part_end': on_part_end,
+    })
+    
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if state['too_large']:
+                raise HTTPException(status_code=413, detail="Upload too large")
+        parser.finalize()
+    except ValueError as e:  # python-multipart parse errors
+        raise HTTPException(status_code=400, detail=f"Malformed multipart body: {e}")
+    
+    if not state['found']:
+        raise HTTPException(status_code=422, detail=f"Missing file field '{field}'")
+    
+    # Drop the multipart framing the Content-Length estimate included
+    del buffer[state['offset']:]
+    return buffer
+
+
+def decode_image(contents: bytes) -> Optional[torch.Tensor]:
+    """
+    Decode an uploaded image into a uint8 RGB tensor of shape (C, H, W).
+    On GPU hosts JPEGs are decoded by nvJPEG straight into device memory;
+    otherwise libjpeg-turbo or OpenCV decode on the CPU and the array is
+    wrapped without copying. Meant to run in a worker thread, as all three
+    decoders release the GIL. Returns None if the bytes cannot be decoded.
+    """
+    if not contents:
+        return None
+    
+    is_jpeg = contents[:2] == b'\xff\xd8'
+    
+    if is_jpeg and DEVICE == 'cuda':
+        try:
+            data = torch.frombuffer(contents, dtype=torch.uint8)
+            return decode_jpeg(data, mode=ImageReadMode.RGB, device=DEVICE)
+        except RuntimeError:
+            pass  # e.g. CMYK or lossless JPEGs nvJPEG cannot handle
+    
+    if is_jpeg and jpeg_decoder is not None:
+        try:
+            img = jpeg_decoder.decode(contents, pixel_format=TJPF_RGB)
+            return torch.from_numpy(img).permute(2, 0, 1)
+        except OSError:
+            pass  # e.g. CMYK JPEGs libjpeg-turbo cannot convert to RGB
+    
+    img = cv2.imdecode(np.frombuffer(contents, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        return None
+    cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=img)
+    
+    return torch.from_numpy(img).permute(2, 0, 1)
+
+
+class DetectionBatcher:
+    """
+    Collects concurrent detection requests for up to MAX_WAIT_MS and runs
+    them through the detector as a single batch
+    """
+    
+    def __init__(self, detector, max_batch: int = MAX_BATCH, max_wait_ms: int = MAX_WAIT_MS):
+        self.detector = detector
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+    
+    async def submit(self, image: torch.Tensor) -> dict:
+        """Queue an image (C, H, W) and wait for its detections"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((image, future))
+        return await future
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            images = [image for image, _ in batch]
+            try:
+                # Run the model off the event loop so uploads keep flowing
+                results = await loop.run_in_executor(None, self.detector.predict, images)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+def load_calibration_tiles() -> Optional[List[torch.Tensor]]:
+    """Decode the sample tiles in QUANTIZE_CALIBRATION_DIR as float (C, H, W) tensors"""
+    if not QUANTIZE_CALIBRATION_DIR:
+        return None
+    
+    calibration_dir = Path(QUANTIZE_CALIBRATION_DIR)
+    if not calibration_dir.is_dir():
+        # The models stay in float, as when no tiles are configured
+        logger.warning(f"Calibration directory {calibration_dir} does not exist, skipping static quantization")
+        return None
+    
+    tiles = []
+    for path in sorted(calibration_dir.iterdir()):
+        if len(tiles) >= MAX_CALIBRATION_TILES:
+            break
+        if not path.is_file():
+            continue
+        tile = decode_image(bytearray(path.read_bytes()))
+        if tile is not None:
+            tiles.append(tile.float().div_(255))
+    return tiles
+
+
+def load_models() -> dict:
+    """Load every model once so weight downloads never hit the request path"""
+    calibration_tiles = load_calibration_tiles() if QUANTIZE_CPU and DEVICE == 'cpu' else None
+    
+    models = {}
+    for model_type in MODEL_TYPES:
+        kwargs = {'device': DEVICE}
+        if model_type in QUANTIZABLE_MODELS:
+            kwargs['quantize'] = QUANTIZE_CPU
+        if model_type in STATIC_QUANTIZED_MODELS:
+            kwargs['calibration_data'] = calibration_tiles
+        if model_type in COMPILABLE_MODELS:
+            kwargs['compile_batch_sizes'] = COMPILE_BATCH_SIZES
+        models[model_type] = ModelFactory.create_model(model_type, **kwargs)
+    return models
+
+
+# With gunicorn --preload the master imports this module before forking, so
+# models loaded here are shared copy-on-write by every worker. CUDA cannot
+# be initialised before fork, so GPU deployments load per worker instead.
+PRELOADED_MODELS = load_models() if PRELOAD_MODELS else None
+
+
+@app.on_event("startup")
+async def startup_models():
+    app.state.models = PRELOADED_MODELS if PRELOADED_MODELS is not None else load_models()
+
+
+@app.on_event("startup")
+async def start_detection_batcher():
+    app.state.detection_batcher = DetectionBatcher(app.state.models['detector'])
+    app.state.detection_batcher.start()
+
+
+@app.on_event("shutdown")
+async def stop_detection_batcher():
+    await app.state.detection_batcher.stop()
+
+
 # API endpoints
-@app.post("/detect/objects", response_model=List[DetectionResult])
-async def detect_objects(image: UploadFile = File(...)):
+@app.post("/detect/objects", response_model=List[DetectionResult], openapi_extra=IMAGE_UPLOAD_OPENAPI)
+async def detect_objects(request: Request):
     """
     Detect objects in satellite/aerial imagery
+    
+    Expects the image in the multipart form field "image"
     """
     try:
         # Read and preprocess image
-        contents = await image.read()
-        nparr = np.frombuffer(contents, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        contents = await stream_upload(request, 'image')
+        tensor = await asyncio.to_thread(decode_image, contents)
+        if tensor is None:
+            raise HTTPException(status_code=400, detail="Could not decode image")
         
-        # TODO: Implement actual detection logic
-        # This is a placeholder that returns dummy data
-        return [{
-            "label": "building",
-            "confidence": 0.95,
-            "bbox": [100, 100, 200, 200],
-            "geometry": {
-                "type": "Polygon",
-                "coordinates": [[[100, 100], [200, 100], [200, 200], [100, 200], [100, 100]]]
-            }
-        }]
+        batcher = app.state.detection_batcher
+        pred = await batcher.submit(tensor)
+        categories = batcher.detector.categories
+        
+        detections = []
+        for box, label, score in zip(pred['boxes'], pred['labels'], pred['scores']):
+            x1, y1, x2, y2 = (float(v) for v in box)
+            detections.append({
+                "label": categories[int(label)],
+                "confidence": float(score),
+                "bbox": [x1, y1, x2, y2],
+                "geometry": {
+                    "type": "Polygon",
+                    "coordinates": [[[x1, y1], [x2, y1], [x2, y2], [x1, y2], [x1, y1]]]
+                }
+            })
+        return detections
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -100,5 +412,7 @@ async def predict_timeseries(data: dict):
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
+    # Single-process development server; production runs under gunicorn:
+    #   gunicorn -c gunicorn.conf.py main:app
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000)
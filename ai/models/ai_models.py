@@ -3,17 +3,375 @@ AI Model definitions for geospatial analysis
 Includes: Object Detection, Segmentation, Change Detection models
 """
 
+import threading
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 import torchvision.models as models
-from torchvision.models.detection import fasterrcnn_resnet50_fpn
+from torchvision.models.detection import fasterrcnn_resnet50_fpn, FasterRCNN_ResNet50_FPN_Weights
 from torchvision.models.segmentation import deeplabv3_resnet50
 import segmentation_models_pytorch as smp
+from torch.ao.quantization import get_default_qconfig_mapping, quantize_dynamic
+from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+import contextlib
 import logging
+import os
+import platform
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Specialize fused kernels on the first two observed input shapes
+torch.jit.set_fusion_strategy([("STATIC", 2)])
+
+# TensorRT modules written by scripts/export_trt.py
+EXPORTED_MODEL_DIR = Path(os.getenv('EXPORTED_MODEL_DIR', Path(__file__).resolve().parent.parent / 'exported'))
+
+# Input ranges the TensorRT engines are built for: detector image sides
+# (min, opt, max) and the largest feature extraction batch
+TRT_DETECTOR_SIDES = (256, 1024, 1344)
+TRT_MAX_BATCH = 16
+
+
+def exported_model_path(name: str, **config) -> Path:
+    """
+    Path of the TensorRT export for one model configuration. Every setting
+    that changes the graph or its input shapes is part of the filename, so
+    an engine is only served to the wrapper config it was built for.
+    """
+    parts = [name]
+    for key, value in sorted(config.items()):
+        if isinstance(value, (tuple, list)):
+            value = '-'.join('x'.join(map(str, v)) if isinstance(v, (tuple, list)) else str(v) for v in value)
+        parts.append(f"{key}-{value}")
+    return EXPORTED_MODEL_DIR / ('_'.join(parts) + '.ts')
+
+
+def load_exported_model(path: Path, device: str):
+    """
+    Load a TensorRT-compiled TorchScript module exported for this model.
+    Returns None when no export exists or it cannot be loaded, so callers
+    fall back to building the eager model.
+    """
+    if torch.device(device).type != 'cuda' or not path.exists():
+        return None
+    
+    try:
+        import torch_tensorrt  # noqa: F401  registers the TensorRT runtime ops
+    except ImportError:
+        logger.warning(f"torch_tensorrt is not installed, ignoring {path}")
+        return None
+    
+    try:
+        model = torch.jit.load(str(path), map_location=device)
+    except Exception as e:
+        logger.warning(f"Could not load exported model {path}: {e}")
+        return None
+    
+    logger.info(f"Loaded TensorRT model from {path}")
+    model.eval()
+    return model
+
+
+def inference_autocast(device_type: str, dtype: Optional[torch.dtype] = None):
+    """
+    Mixed precision context for model forwards: BF16 on GPUs that support
+    it (no loss scaling concerns), FP16 on older GPUs, disabled elsewhere.
+    Pass dtype to pin the precision for models whose outputs cannot
+    tolerate BF16's 8-bit mantissa.
+    """
+    if device_type != 'cuda':
+        return contextlib.nullcontext()
+    if dtype is None:
+        dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+    return torch.autocast(device_type='cuda', dtype=dtype)
+
+
+def select_quantized_engine() -> str:
+    """Use the x86 int8 kernels (FBGEMM/oneDNN) on x86 and QNNPACK on ARM"""
+    machine = platform.machine().lower()
+    engine = 'qnnpack' if machine.startswith(('arm', 'aarch')) else 'x86'
+    torch.backends.quantized.engine = engine
+    return engine
+
+
+def quantize_static_int8(
+    model: nn.Module,
+    example_inputs: tuple,
+    calibration_data: Optional[Iterable[torch.Tensor]]
+) -> nn.Module:
+    """
+    Post-training static int8 quantization for CPU inference (FX graph mode).
+    Activation ranges are calibrated on real sample tiles, resized to the
+    example input's size. Without calibration tiles, or if the model cannot
+    be traced, the float model is returned unchanged.
+    """
+    name = type(model).__name__
+    tiles = list(calibration_data) if calibration_data is not None else []
+    if not tiles:
+        logger.warning(f"No calibration tiles given, keeping {name} in float")
+        return model
+    
+    engine = select_quantized_engine()
+    qconfig_mapping = get_default_qconfig_mapping(engine)
+    
+    try:
+        prepared = prepare_fx(model, qconfig_mapping, example_inputs)
+    except Exception as e:
+        logger.warning(f"Could not quantize {name}, using float model: {e}")
+        return model
+    
+    size = example_inputs[0].shape[-2:]
+    with torch.inference_mode():
+        for tile in tiles:
+            if tile.dim() == 3:
+                tile = tile.unsqueeze(0)
+            tile = F.interpolate(tile.float(), size=size, mode='bilinear', align_corners=False)
+            prepared(tile.contiguous(memory_format=torch.channels_last))
+    
+    logger.info(f"Quantized {name} to int8 ({engine}) using {len(tiles)} calibration tiles")
+    return convert_fx(prepared)
+
+
+def warm_up(
+    model,
+    example_inputs: tuple,
+    device_type: str = 'cpu',
+    iters: int = 2,
+    autocast_dtype: Optional[torch.dtype] = None
+):
+    """Run a few inference forwards, as served, on example inputs"""
+    with torch.inference_mode(), inference_autocast(device_type, autocast_dtype):
+        for _ in range(iters):
+            model(*example_inputs)
+
+
+@contextlib.contextmanager
+def onednn_fusion(enabled: bool):
+    """Toggle oneDNN Graph fusion for the TorchScript graphs optimized inside the block"""
+    previous = torch.jit.onednn_fusion_enabled()
+    torch.jit.enable_onednn_fusion(enabled)
+    try:
+        yield
+    finally:
+        torch.jit.enable_onednn_fusion(previous)
+
+
+def _error_summary(error: Exception) -> str:
+    """First line of an error; TorchScript errors append the whole graph IR"""
+    lines = str(error).strip().splitlines()
+    return lines[0] if lines else type(error).__name__
+
+
+def script_for_inference(
+    model: nn.Module,
+    example_inputs: tuple,
+    device_type: str = 'cpu',
+    warmup_iters: int = 2,
+    autocast_dtype: Optional[torch.dtype] = None
+):
+    """
+    Script, freeze and optimize a model for inference, then warm it up on
+    example inputs so the fuser specializes on the expected shape.
+    
+    Conversion and warmup are tried per stage (optimized -> frozen ->
+    eager): a graph that converts but fails when first run falls back to
+    the next stage instead of failing the load. On CPU each stage is tried
+    with oneDNN Graph fusion first and then without it, since the fusion
+    pass rejects some graphs (LSTM state lists, detection heads). Fusion
+    is only enabled while the warmup optimizes the graph, never process-wide.
+    """
+    name = type(model).__name__
+    stages = []
+    try:
+        scripted = torch.jit.script(model)
+        # optimize_for_inference rewrites its input in place, so every
+        # attempt freezes its own copy
+        stages.append(('optimized', lambda: torch.jit.optimize_for_inference(torch.jit.freeze(scripted))))
+        stages.append(('frozen', lambda: torch.jit.freeze(scripted)))
+    except Exception as e:
+        logger.warning(f"Could not script {name}, using eager model: {_error_summary(e)}")
+    
+    fusion_options = (True, False) if device_type == 'cpu' else (False,)
+    for stage, build in stages:
+        for fuse in fusion_options:
+            label = f"{stage.capitalize()} {name}" + (" with oneDNN fusion" if fuse else "")
+            try:
+                candidate = build()
+                with onednn_fusion(fuse):
+                    warm_up(candidate, example_inputs, device_type, warmup_iters, autocast_dtype)
+                logger.info(f"{label} ready")
+                return candidate
+            except Exception as e:
+                logger.warning(f"{label} failed, falling back: {_error_summary(e)}")
+    
+    warm_up(model, example_inputs, device_type, warmup_iters, autocast_dtype)
+    return model
+
+
+class CUDAGraphRunner:
+    """
+    Captures a fixed-shape forward pass into a CUDA graph and replays it,
+    removing per-kernel launch overhead. Inputs of any other shape fall
+    back to the eager model.
+    """
+    
+    def __init__(self, model: nn.Module, input_shape: Tuple[int, ...], device: str, warmup_iters: int = 3):
+        self.model = model
+        self._lock = threading.Lock()
+        self.static_input = torch.zeros(input_shape, device=device).contiguous(memory_format=torch.channels_last)
+        
+        # Warm up on a side stream so lazy initialisation (cuDNN autotuning,
+        # allocator pools) is not recorded into the graph
+        stream = torch.cuda.Stream()
+        stream.wait_stream(torch.cuda.current_stream())
+        with torch.cuda.stream(stream), torch.inference_mode(), inference_autocast('cuda'):
+            for _ in range(warmup_iters):
+                model(self.static_input)
+        torch.cuda.current_stream().wait_stream(stream)
+        
+        # Autocast is recorded into the graph, so replays run mixed precision too
+        self.graph = torch.cuda.CUDAGraph()
+        with torch.inference_mode(), inference_autocast('cuda'), torch.cuda.graph(self.graph):
+            self.static_output = model(self.static_input)
+    
+    def __call__(self, x: torch.Tensor):
+        if x.shape != self.static_input.shape:
+            return self.model(x)
+        
+        # Static buffers are shared, so replays must not interleave
+        with self._lock:
+            self.static_input.copy_(x)
+            self.graph.replay()
+            if isinstance(self.static_output, dict):
+                return {k: v.clone() for k, v in self.static_output.items()}
+            return self.static_output.clone()
+
+
+class ShapeSpecializedModel:
+    """
+    Routes each input to a torch.compile variant specialized (dynamic=False)
+    for its exact shape. Other shapes go to the generic fallback model, so
+    an unexpected input never triggers a compile on the request path.
+    """
+    
+    def __init__(self, model: nn.Module, fallback, shapes: Iterable[Tuple[int, ...]], device: str):
+        self.fallback = fallback
+        self.compiled = {}
+        device_type = torch.device(device).type
+        
+        for shape in shapes:
+            shape = tuple(shape)
+            try:
+                compiled = torch.compile(model, dynamic=False, mode='max-autotune')
+                example = torch.rand(shape, device=device).contiguous(memory_format=torch.channels_last)
+                # The first forward runs autotuning and writes the kernel cache
+                with torch.inference_mode(), inference_autocast(device_type):
+                    compiled(example)
+            except Exception as e:
+                logger.warning(f"Could not compile {type(model).__name__} for shape {shape}: {e}")
+                continue
+            self.compiled[shape] = compiled
+    
+    def __call__(self, x: torch.Tensor):
+        return self.compiled.get(tuple(x.shape), self.fallback)(x)
+
+
+def build_runner(
+    model,
+    eager_model: Optional[nn.Module],
+    exported,
+    shapes: Iterable[Tuple[int, ...]],
+    device: str,
+    graph_shape: Tuple[int, ...]
+):
+    """
+    Pick how a fixed-input model is launched: shape-specialized compiled
+    variants when shapes are configured, otherwise a captured CUDA graph
+    of graph_shape on CUDA devices, otherwise the model itself
+    """
+    shapes = list(shapes)
+    if shapes and eager_model is not None:
+        specialized = ShapeSpecializedModel(eager_model, model, shapes, device)
+        if specialized.compiled:
+            return specialized
+        logger.warning("No shape-specialized variant compiled, falling back")
+    
+    # TensorRT engines manage their own launches
+    if torch.device(device).type != 'cuda' or exported is not None:
+        return model
+    return CUDAGraphRunner(model, graph_shape, device)
+
+
+def has_fixed_input(runner, exported) -> bool:
+    """
+    Whether a runner is only fast at its built input size: captured CUDA
+    graphs, shape-specialized compiles and TensorRT engines
+    """
+    return exported is not None or isinstance(runner, (CUDAGraphRunner, ShapeSpecializedModel))
+
+
+class PinnedStager:
+    """
+    Moves host tensors to the model device. On CUDA the data is staged
+    through reusable pinned buffers and copied on a dedicated stream, so
+    transfers run as async DMA instead of synchronous pageable copies.
+    Device tensors are allocated through the caching allocator and
+    reused across calls.
+    """
+    
+    def __init__(self, device: str, num_buffers: int = 2):
+        self.device = device
+        self.enabled = torch.device(device).type == 'cuda'
+        self._lock = threading.Lock()
+        self._buffers = [None] * num_buffers
+        self._events = [None] * num_buffers
+        self._next = 0
+        self.copy_stream = torch.cuda.Stream(device=device) if self.enabled else None
+    
+    def _staging_view(self, x: torch.Tensor, memory_format):
+        """Return a pinned view shaped like x, cycling through the buffer ring"""
+        idx = self._next
+        self._next = (idx + 1) % len(self._buffers)
+        
+        # The previous copy out of this buffer must finish before overwriting it
+        if self._events[idx] is not None:
+            self._events[idx].synchronize()
+        
+        buf = self._buffers[idx]
+        if buf is None or buf.numel() < x.numel() or buf.dtype != x.dtype:
+            buf = torch.empty(x.numel(), dtype=x.dtype, pin_memory=True)
+            self._buffers[idx] = buf
+        
+        flat = buf[:x.numel()]
+        if memory_format == torch.channels_last and x.dim() == 4:
+            n, c, h, w = x.shape
+            return idx, flat.view(n, h, w, c).permute(0, 3, 1, 2)
+        return idx, flat.view(x.shape)
+    
+    def to_device(self, x: torch.Tensor, memory_format=torch.preserve_format) -> torch.Tensor:
+        if not self.enabled or x.is_cuda:
+            return x.to(self.device, memory_format=memory_format)
+        
+        with self._lock:
+            idx, pinned = self._staging_view(x, memory_format)
+            pinned.copy_(x)
+            
+            with torch.cuda.stream(self.copy_stream):
+                out = torch.empty_like(pinned, device=self.device)
+                out.copy_(pinned, non_blocking=True)
+                event = torch.cuda.Event()
+                event.record(self.copy_stream)
+            self._events[idx] = event
+        
+        # Order compute after the copy and tell the allocator where out is used
+        compute_stream = torch.cuda.current_stream(self.device)
+        compute_stream.wait_event(event)
+        out.record_stream(compute_stream)
+        return out
+
 
 class GeospatialObjectDetector:
     """
@@ -21,42 +379,132 @@ class GeospatialObjectDetector:
     Detects: buildings, vehicles, roads, water bodies
     """
     
-    def __init__(self, num_classes: int = 91, device: str = 'cpu'):
+    # torchvision decodes boxes in the dtype of the regression head, so
+    # under BF16 coordinates near 1000 px snap to 4-8 px steps. FP16 keeps
+    # them within half a pixel.
+    AUTOCAST_DTYPE = torch.float16
+    
+    def __init__(
+        self,
+        num_classes: int = 91,
+        quantize: bool = False,
+        use_exported: bool = True,
+        keep_eager_model: bool = False,
+        device: str = 'cpu'
+    ):
         self.device = device
+        self.device_type = torch.device(device).type
         self.num_classes = num_classes
+        self.quantize = quantize and self.device_type == 'cpu'
+        self.use_exported = use_exported
+        self.keep_eager_model = keep_eager_model
+        self.categories = FasterRCNN_ResNet50_FPN_Weights.COCO_V1.meta['categories']
+        self.stager = PinnedStager(device)
         self.model = self._load_model()
         
     def _load_model(self):
         """Load Faster R-CNN model"""
         logger.info("Loading Faster R-CNN model")
+        self.eager_model = None
+        self.exported = load_exported_model(self.export_path(), self.device) if self.use_exported else None
+        if self.exported is not None:
+            return self.exported
+        
         model = fasterrcnn_resnet50_fpn(pretrained=True)
-        model.to(self.device)
+        model.to(self.device, memory_format=torch.channels_last)
         model.eval()
-        return model
+        if self.quantize:
+            # Detection control flow is not FX-traceable; dynamically quantize
+            # the linear layers instead, most of which sit in the box head
+            select_quantized_engine()
+            model = quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+        # Freezing copies the folded weights, so only keep the eager model
+        # when something needs it (scripts/export_trt.py)
+        self.eager_model = model if self.keep_eager_model else None
+        example = [torch.rand(3, 512, 512, device=self.device)]
+        return script_for_inference(model, (example,), self.device_type, autocast_dtype=self.AUTOCAST_DTYPE)
     
-    def predict(self, image: torch.Tensor, threshold: float = 0.5):
+    def engine_input_shapes(self):
+        """(min, opt, max) image shapes the TensorRT engine is built for"""
+        return tuple((3, side, side) for side in TRT_DETECTOR_SIDES)
+    
+    def export_path(self) -> Path:
+        return exported_model_path('detector', num_classes=self.num_classes, shapes=self.engine_input_shapes())
+    
+    def _predict_exported(self, image: torch.Tensor) -> dict:
+        """
+        Run one image through the TensorRT engine. Images larger than the
+        engine's max side are downscaled and smaller ones zero-padded, and
+        the boxes are mapped back to the original image.
         """
-        Predict objects in image
+        min_side, _, max_side = TRT_DETECTOR_SIDES
+        height, width = image.shape[-2:]
+        
+        scale = min(1.0, max_side / max(height, width))
+        # At least one pixel, so extreme aspect ratios still have both sides
+        fit_height, fit_width = max(1, int(height * scale)), max(1, int(width * scale))
+        if scale < 1.0:
+            image = F.interpolate(
+                image.unsqueeze(0),
+                size=(fit_height, fit_width),
+                mode='bilinear',
+                align_corners=False
+            ).squeeze(0)
+        image = F.pad(image, (0, max(0, min_side - fit_width), 0, max(0, min_side - fit_height)))
+        
+        output = self.model([image])
+        if isinstance(output, tuple):
+            output = output[1]
+        pred = dict(output[0])
+        
+        boxes = pred['boxes'].float()
+        boxes[:, 0::2] = boxes[:, 0::2].clamp(0, fit_width) * (width / fit_width)
+        boxes[:, 1::2] = boxes[:, 1::2].clamp(0, fit_height) * (height / fit_height)
+        pred['boxes'] = boxes
+        return pred
+    
+    def predict(self, images: List[torch.Tensor], threshold: float = 0.5):
+        """
+        Predict objects in a batch of images
         
         Args:
-            image: Tensor of shape (C, H, W)
+            images: List of tensors of shape (C, H, W), sizes may differ.
+                uint8 images are scaled to [0, 1] after the device copy,
+                which moves a quarter of the bytes of float input
             threshold: Confidence threshold
             
         Returns:
-            List of detections with boxes, labels, and scores
+            List with one dict of boxes, labels, and scores per image
         """
-        with torch.no_grad():
-            predictions = self.model([image.to(self.device)])
+        with torch.inference_mode(), inference_autocast(self.device_type, self.AUTOCAST_DTYPE):
+            batch = []
+            for image in images:
+                image = self.stager.to_device(image)
+                if image.dtype == torch.uint8:
+                    image = image.float().div_(255)
+                batch.append(image)
+            
+            if self.exported is not None:
+                # The engine takes one image within its shape range per call
+                predictions = [self._predict_exported(image) for image in batch]
+            else:
+                predictions = self.model(batch)
+        
+        # Scripted detection models return (losses, detections)
+        if isinstance(predictions, tuple):
+            predictions = predictions[1]
         
-        # Filter predictions by threshold
-        pred = predictions[0]
-        keep = pred['scores'] > threshold
+        results = []
+        for pred in predictions:
+            # Filter predictions by threshold
+            keep = pred['scores'] > threshold
+            results.append({
+                'boxes': pred['boxes'][keep].float().cpu().numpy(),
+                'labels': pred['labels'][keep].cpu().numpy(),
+                'scores': pred['scores'][keep].float().cpu().numpy()
+            })
         
-        return {
-            'boxes': pred['boxes'][keep].cpu().numpy(),
-            'labels': pred['labels'][keep].cpu().numpy(),
-            'scores': pred['scores'][keep].cpu().numpy()
-        }
+        return results
 
 
 class LandCoverSegmentation:
@@ -70,17 +518,47 @@ class LandCoverSegmentation:
         architecture: str = 'unet',
         encoder: str = 'resnet50',
         num_classes: int = 5,
+        input_size: Tuple[int, int] = (512, 512),
+        quantize: bool = False,
+        calibration_data: Optional[Iterable[torch.Tensor]] = None,
+        compile_batch_sizes: Iterable[int] = (),
+        use_exported: bool = True,
+        keep_eager_model: bool = False,
         device: str = 'cpu'
     ):
         self.device = device
+        self.device_type = torch.device(device).type
         self.num_classes = num_classes
         self.architecture = architecture
         self.encoder = encoder
+        self.input_size = input_size
+        self.quantize = quantize and self.device_type == 'cpu'
+        self.calibration_data = calibration_data
+        self.compile_batch_sizes = list(compile_batch_sizes)
+        self.use_exported = use_exported
+        self.keep_eager_model = keep_eager_model
+        self.stager = PinnedStager(device)
         self.model = self._load_model()
+        self.runner = build_runner(
+            self.model,
+            self.eager_model,
+            self.exported,
+            [(batch_size, 3, *self.input_size) for batch_size in self.compile_batch_sizes],
+            self.device,
+            graph_shape=(1, 3, *self.input_size)
+        )
+        # Freezing copies the folded weights; the eager model is only needed
+        # to compile variants above or by scripts/export_trt.py
+        if not self.keep_eager_model:
+            self.eager_model = None
     
     def _load_model(self):
         """Load segmentation model"""
         logger.info(f"Loading {self.architecture} with {self.encoder} encoder")
+        self.eager_model = None
+        self.exported = load_exported_model(self.export_path(), self.device) if self.use_exported else None
+        if self.exported is not None:
+            return self.exported
         
         if self.architecture == 'unet':
             model = smp.Unet(
@@ -96,9 +574,30 @@ class LandCoverSegmentation:
         else:
             raise ValueError(f"Unknown architecture: {self.architecture}")
         
-        model.to(self.device)
+        model.to(self.device, memory_format=torch.channels_last)
         model.eval()
-        return model
+        example = torch.rand(1, 3, *self.input_size, device=self.device).contiguous(memory_format=torch.channels_last)
+        if self.quantize and self.architecture == 'unet':
+            # Unet.forward branches on the input shape and cannot be FX-traced,
+            # so quantize the encoder, which carries most of the weights and FLOPs
+            model.encoder = quantize_static_int8(model.encoder, (example,), self.calibration_data)
+        elif self.quantize:
+            model = quantize_static_int8(model, (example,), self.calibration_data)
+        self.eager_model = model
+        return script_for_inference(model, (example,), self.device_type)
+    
+    def engine_input_shapes(self):
+        """(min, opt, max) input shapes the TensorRT engine is built for"""
+        return ((1, 3, *self.input_size),) * 3
+    
+    def export_path(self) -> Path:
+        return exported_model_path(
+            'segmentation',
+            architecture=self.architecture,
+            encoder=self.encoder,
+            num_classes=self.num_classes,
+            shapes=self.engine_input_shapes()
+        )
     
     def predict(self, image: torch.Tensor):
         """
@@ -110,15 +609,54 @@ class LandCoverSegmentation:
         Returns:
             Segmentation mask of shape (H, W)
         """
-        with torch.no_grad():
-            logits = self.model(image.unsqueeze(0).to(self.device))
-            
-            if isinstance(logits, dict):
-                logits = logits['out']
+        with torch.inference_mode():
+            x = self.stager.to_device(image.unsqueeze(0), memory_format=torch.channels_last)
+            with inference_autocast(self.device_type):
+                if has_fixed_input(self.runner, self.exported):
+                    logits = self._predict_tiled(x)
+                else:
+                    logits = self._forward(x)
             
             pred = torch.argmax(logits, dim=1).squeeze(0)
         
         return pred.cpu().numpy()
+    
+    def _forward(self, x: torch.Tensor) -> torch.Tensor:
+        logits = self.runner(x)
+        if isinstance(logits, dict):
+            logits = logits['out']
+        return logits
+    
+    def _predict_tiled(self, x: torch.Tensor) -> torch.Tensor:
+        """
+        Segment x in input_size tiles so a fixed-shape runner sees only the
+        shape it was built for and the mask keeps the native resolution.
+        The image is edge-padded to whole tiles and the logits cropped back.
+        """
+        tile_height, tile_width = self.input_size
+        _, channels, height, width = x.shape
+        x = F.pad(x, (0, -width % tile_width, 0, -height % tile_height), mode='replicate')
+        rows, cols = x.shape[-2] // tile_height, x.shape[-1] // tile_width
+        
+        # (1, C, rows, cols, th, tw) -> (rows * cols, C, th, tw)
+        tiles = x.unfold(2, tile_height, tile_height).unfold(3, tile_width, tile_width)
+        tiles = tiles.permute(0, 2, 3, 1, 4, 5).reshape(-1, channels, tile_height, tile_width)
+        
+        # Run tiles in batches the runner was built for, padding the last one
+        batch_size = max(self.compile_batch_sizes, default=1) if isinstance(self.runner, ShapeSpecializedModel) else 1
+        outputs = []
+        for batch in tiles.split(batch_size):
+            count = len(batch)
+            if count < batch_size:
+                batch = torch.cat([batch, batch.new_zeros(batch_size - count, *batch.shape[1:])])
+            outputs.append(self._forward(batch.contiguous(memory_format=torch.channels_last))[:count].float())
+        logits = torch.cat(outputs)
+        
+        # (rows * cols, K, th, tw) -> (1, K, rows * th, cols * tw)
+        num_classes = logits.shape[1]
+        logits = logits.view(rows, cols, num_classes, tile_height, tile_width)
+        logits = logits.permute(2, 0, 3, 1, 4).reshape(1, num_classes, rows * tile_height, cols * tile_width)
+        return logits[..., :height, :width]
 
 
 class ChangeDetectionModel:
@@ -128,6 +666,8 @@ class ChangeDetectionModel:
     
     def __init__(self, device: str = 'cpu'):
         self.device = device
+        self.device_type = torch.device(device).type
+        self.stager = PinnedStager(device)
         self.model = self._build_model()
     
     def _build_model(self):
@@ -138,9 +678,10 @@ class ChangeDetectionModel:
             def __init__(self):
                 super(SiameseNet, self).__init__()
                 
-                # Feature extractor (shared weights)
-                self.encoder = models.resnet18(pretrained=True)
-                self.encoder.fc = nn.Identity()  # Remove final FC layer
+                # Feature extractor (shared weights), keeping the last
+                # conv feature map (512 x H/32 x W/32) instead of the pooled vector
+                backbone = models.resnet18(weights=models.ResNet18_Weights.IMAGENET1K_V1)
+                self.encoder = nn.Sequential(*list(backbone.children())[:-2])
                 
                 # Change detector
                 self.decoder = nn.Sequential(
@@ -162,19 +703,22 @@ class ChangeDetectionModel:
                 # Compute difference
                 diff = torch.abs(f1 - f2)
                 
-                # Reshape for decoder
-                diff = diff.view(diff.size(0), -1, 1, 1)
-                diff = diff.expand(-1, -1, 8, 8)  # Adjust size as needed
-                
-                # Predict change mask
+                # Predict change mask and upsample to input resolution
                 change_mask = self.decoder(diff)
+                change_mask = F.interpolate(
+                    change_mask,
+                    size=x1.shape[-2:],
+                    mode='bilinear',
+                    align_corners=False
+                )
                 
                 return change_mask
         
         model = SiameseNet()
-        model.to(self.device)
+        model.to(self.device, memory_format=torch.channels_last)
         model.eval()
-        return model
+        example = torch.rand(1, 3, 224, 224, device=self.device).contiguous(memory_format=torch.channels_last)
+        return script_for_inference(model, (example, example), self.device_type)
     
     def predict(self, image1: torch.Tensor, image2: torch.Tensor):
         """
@@ -187,13 +731,13 @@ class ChangeDetectionModel:
         Returns:
             Change mask
         """
-        with torch.no_grad():
+        with torch.inference_mode(), inference_autocast(self.device_type):
             change_mask = self.model(
-                image1.unsqueeze(0).to(self.device),
-                image2.unsqueeze(0).to(self.device)
+                self.stager.to_device(image1.unsqueeze(0), memory_format=torch.channels_last),
+                self.stager.to_device(image2.unsqueeze(0), memory_format=torch.channels_last)
             )
         
-        return change_mask.squeeze().cpu().numpy()
+        return change_mask.squeeze().float().cpu().numpy()
 
 
 class TimeSeriesPredictor:
@@ -202,8 +746,18 @@ class TimeSeriesPredictor:
     Use cases: vegetation index forecasting, urban growth prediction
     """
     
-    def __init__(self, input_size: int = 10, hidden_size: int = 64, num_layers: int = 2, device: str = 'cpu'):
+    def __init__(
+        self,
+        input_size: int = 10,
+        hidden_size: int = 64,
+        num_layers: int = 2,
+        seq_len: int = 12,
+        device: str = 'cpu'
+    ):
         self.device = device
+        self.device_type = torch.device(device).type
+        self.seq_len = seq_len
+        self.stager = PinnedStager(device)
         self.model = self._build_model(input_size, hidden_size, num_layers)
     
     def _build_model(self, input_size, hidden_size, num_layers):
@@ -232,7 +786,10 @@ class TimeSeriesPredictor:
         model = LSTMPredictor(input_size, hidden_size, num_layers)
         model.to(self.device)
         model.eval()
-        return model
+        # Warm up on the expected sequence length so the fused LSTM gates
+        # specialize on the shape actually served
+        example = torch.zeros(1, self.seq_len, input_size, device=self.device)
+        return script_for_inference(model, (example,), self.device_type)
     
     def predict(self, sequence: torch.Tensor):
         """
@@ -244,10 +801,22 @@ class TimeSeriesPredictor:
         Returns:
             Predicted value
         """
-        with torch.no_grad():
-            pred = self.model(sequence.unsqueeze(0).to(self.device))
+        return float(self.predict_many(sequence.unsqueeze(0))[0])
+    
+    def predict_many(self, sequences: torch.Tensor):
+        """
+        Predict the next value of several series in one forward pass
+        
+        Args:
+            sequences: Tensor of shape (batch, seq_len, input_size)
+            
+        Returns:
+            Predicted values of shape (batch,)
+        """
+        with torch.inference_mode(), inference_autocast(self.device_type):
+            preds = self.model(self.stager.to_device(sequences))
         
-        return pred.item()
+        return preds.squeeze(-1).float().cpu().numpy()
 
 
 class FeatureExtractor:
@@ -255,13 +824,48 @@ class FeatureExtractor:
     Extract features from satellite imagery for various downstream tasks
     """
     
-    def __init__(self, model_name: str = 'resnet50', device: str = 'cpu'):
+    def __init__(
+        self,
+        model_name: str = 'resnet50',
+        input_size: Tuple[int, int] = (224, 224),
+        quantize: bool = False,
+        calibration_data: Optional[Iterable[torch.Tensor]] = None,
+        compile_batch_sizes: Iterable[int] = (),
+        use_exported: bool = True,
+        keep_eager_model: bool = False,
+        device: str = 'cpu'
+    ):
         self.device = device
+        self.device_type = torch.device(device).type
+        self.model_name = model_name
+        self.input_size = input_size
+        self.quantize = quantize and self.device_type == 'cpu'
+        self.calibration_data = calibration_data
+        self.compile_batch_sizes = list(compile_batch_sizes)
+        self.use_exported = use_exported
+        self.keep_eager_model = keep_eager_model
+        self.stager = PinnedStager(device)
         self.model = self._load_model(model_name)
+        self.runner = build_runner(
+            self.model,
+            self.eager_model,
+            self.exported,
+            [(batch_size, 3, *self.input_size) for batch_size in self.compile_batch_sizes],
+            self.device,
+            graph_shape=(1, 3, *self.input_size)
+        )
+        # Freezing copies the folded weights; the eager model is only needed
+        # to compile variants above or by scripts/export_trt.py
+        if not self.keep_eager_model:
+            self.eager_model = None
     
     def _load_model(self, model_name: str):
         """Load pre-trained model"""
         logger.info(f"Loading feature extractor: {model_name}")
+        self.eager_model = None
+        self.exported = load_exported_model(self.export_path(), self.device) if self.use_exported else None
+        if self.exported is not None:
+            return self.exported
         
         if model_name == 'resnet50':
             model = models.resnet50(pretrained=True)
@@ -272,9 +876,24 @@ class FeatureExtractor:
         else:
             raise ValueError(f"Unknown model: {model_name}")
         
-        model.to(self.device)
+        model.to(self.device, memory_format=torch.channels_last)
         model.eval()
-        return model
+        example = torch.rand(1, 3, *self.input_size, device=self.device).contiguous(memory_format=torch.channels_last)
+        if self.quantize:
+            model = quantize_static_int8(model, (example,), self.calibration_data)
+        self.eager_model = model
+        return script_for_inference(model, (example,), self.device_type)
+    
+    def engine_input_shapes(self):
+        """(min, opt, max) input shapes the TensorRT engine is built for"""
+        return tuple((batch_size, 3, *self.input_size) for batch_size in (1, TRT_MAX_BATCH // 2, TRT_MAX_BATCH))
+    
+    def export_path(self) -> Path:
+        return exported_model_path(
+            'feature_extractor',
+            model_name=self.model_name,
+            shapes=self.engine_input_shapes()
+        )
     
     def extract(self, image: torch.Tensor):
         """
@@ -286,10 +905,31 @@ class FeatureExtractor:
         Returns:
             Feature vector
         """
-        with torch.no_grad():
-            features = self.model(image.unsqueeze(0).to(self.device))
+        return self.extract_batch(image.unsqueeze(0))[0]
+    
+    def extract_batch(self, images: torch.Tensor):
+        """
+        Extract features from a stack of images in a single forward pass
+        
+        Args:
+            images: Tensor of shape (N, C, H, W), resized to input_size
+                when the runner only serves that shape
+            
+        Returns:
+            Feature matrix of shape (N, D)
+        """
+        with torch.inference_mode():
+            x = self.stager.to_device(images, memory_format=torch.channels_last)
+            # Features are pooled over the whole image, so fixed-shape runners
+            # get a resized copy; other runners take the native resolution
+            if has_fixed_input(self.runner, self.exported) and tuple(x.shape[-2:]) != tuple(self.input_size):
+                x = F.interpolate(x, size=self.input_size, mode='bilinear', align_corners=False)
+            # TensorRT engines only accept batches up to TRT_MAX_BATCH
+            chunk_size = TRT_MAX_BATCH if self.exported is not None else max(len(x), 1)
+            with inference_autocast(self.device_type):
+                features = torch.cat([self.runner(chunk) for chunk in x.split(chunk_size)])
         
-        return features.squeeze().cpu().numpy()
+        return features.flatten(1).float().cpu().numpy()
 
 
 # Model factory
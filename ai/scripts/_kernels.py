@@ -0,0 +1,27 @@
+"""
+Numba kernels for per-pixel raster band math
+Compiled kernels are cached on disk, so only the first process pays the JIT cost
+"""
+
+import numba
+import numpy as np
+
+
+@numba.njit(parallel=True, fastmath=True, cache=True)
+def normalized_difference(a, b, out):
+    """
+    Compute (a - b) / (a + b) per pixel into a preallocated float32 array.
+    Basis for NDVI (NIR, Red), NDWI (Green, NIR) and similar indices.
+    """
+    eps = np.float32(1e-8)
+    for i in numba.prange(a.shape[0]):
+        for j in range(a.shape[1]):
+            x = np.float32(a[i, j])
+            y = np.float32(b[i, j])
+            out[i, j] = (x - y) / (x + y + eps)
+    return out
+
+
+def ndvi(nir: np.ndarray, red: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """Normalized Difference Vegetation Index"""
+    return normalized_difference(nir, red, out)
@@ -3,20 +3,36 @@ Data Pipeline for Geospatial Data Ingestion and Processing
 Handles: GDAL, GeoPandas, Apache Kafka integration
 """
 
+import asyncio
 import logging
 import os
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Union
 from datetime import datetime
-import json
 
 import geopandas as gpd
 import pandas as pd
 import numpy as np
+import orjson
 from osgeo import gdal, ogr, osr
+import shapely
 from shapely.geometry import shape, mapping
 import rasterio
 from rasterio.warp import calculate_default_transform, reproject, Resampling
-import requests
+import httpx
+
+try:
+    import numexpr as ne
+except ImportError:  # Optional: fall back to blocked NumPy band math
+    ne = None
+
+try:
+    from ._kernels import ndvi as ndvi_kernel
+except ImportError:
+    try:
+        from _kernels import ndvi as ndvi_kernel
+    except ImportError:  # Optional: numba not installed
+        ndvi_kernel = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,6 +41,15 @@ logger = logging.getLogger(__name__)
 gdal.UseExceptions()
 
 
+def _json_default(obj):
+    """Encode values orjson does not handle natively (timestamps, numpy scalars)"""
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return str(obj)
+
+
 class GeoDataPipeline:
     """Main pipeline for geospatial data processing"""
     
@@ -52,9 +77,16 @@ class GeoDataPipeline:
             logger.error(f"Error ingesting vector data: {e}")
             raise
     
-    def ingest_raster_data(self, file_path: str, target_crs: str = "EPSG:4326") -> Dict[str, Any]:
+    def ingest_raster_data(
+        self,
+        file_path: str,
+        target_crs: str = "EPSG:4326",
+        channels_last: bool = False
+    ) -> Dict[str, Any]:
         """
         Ingest raster data (GeoTIFF, JPEG2000, etc.)
+        Data is (bands, H, W), or (H, W, bands) with channels_last=True to
+        match the layout the Torch models consume
         """
         try:
             logger.info(f"Reading raster data from {file_path}")
@@ -72,13 +104,16 @@ class GeoDataPipeline:
                     'transform': src.transform
                 }
                 
-                # Read raster data
-                data = src.read()
-                
-                # Reproject if needed
+                # Reproject if needed, otherwise read as-is
                 if str(src.crs) != target_crs:
                     logger.info(f"Reprojecting raster from {src.crs} to {target_crs}")
-                    data, metadata = self._reproject_raster(src, target_crs)
+                    data, metadata = self._reproject_raster(src, target_crs, channels_last)
+                elif channels_last:
+                    # Read straight into an interleaved buffer, no per-band copies
+                    data = np.empty((src.height, src.width, src.count), dtype=src.dtypes[0])
+                    src.read(out=data.transpose(2, 0, 1))
+                else:
+                    data = src.read()
                 
                 return {
                     'data': data,
@@ -89,8 +124,24 @@ class GeoDataPipeline:
             logger.error(f"Error ingesting raster data: {e}")
             raise
     
-    def _reproject_raster(self, src, target_crs: str) -> tuple:
-        """Reproject raster to target CRS"""
+    def iter_raster_blocks(self, file_path: str):
+        """
+        Stream a raster block by block instead of loading it whole.
+        Yields (window, tile) pairs where tile is an (H, W, bands) view into
+        a single reused buffer, so copy any tile that must outlive the
+        iteration.
+        """
+        with rasterio.open(file_path) as src:
+            block_height, block_width = src.block_shapes[0]
+            buffer = np.empty((block_height, block_width, src.count), dtype=src.dtypes[0])
+            
+            for _, window in src.block_windows(1):
+                tile = buffer[:int(window.height), :int(window.width)]
+                src.read(window=window, out=tile.transpose(2, 0, 1))
+                yield window, tile
+    
+    def _reproject_raster(self, src, target_crs: str, channels_last: bool = False) -> tuple:
+        """Reproject raster to target CRS, optionally warping straight into (H, W, bands)"""
         dst_crs = target_crs
         
         transform, width, height = calculate_default_transform(
@@ -105,19 +156,28 @@ class GeoDataPipeline:
             'height': height
         })
         
-        # Create destination array
-        destination = np.zeros((src.count, height, width), dtype=src.dtypes[0])
+        # Create destination array; for channels_last, GDAL writes through a
+        # (bands, H, W) view of the (H, W, bands) buffer so no copy is needed
+        if channels_last:
+            destination = np.zeros((height, width, src.count), dtype=src.dtypes[0])
+            warp_target = destination.transpose(2, 0, 1)
+        else:
+            destination = np.zeros((src.count, height, width), dtype=src.dtypes[0])
+            warp_target = destination
         
-        for i in range(1, src.count + 1):
-            reproject(
-                source=rasterio.band(src, i),
-                destination=destination[i-1],
-                src_transform=src.transform,
-                src_crs=src.crs,
-                dst_transform=transform,
-                dst_crs=dst_crs,
-                resampling=Resampling.bilinear
-            )
+        # Warp all bands in one call so GDAL can overlap I/O and spread the
+        # work across its thread pool
+        reproject(
+            source=rasterio.band(src, list(range(1, src.count + 1))),
+            destination=warp_target,
+            src_transform=src.transform,
+            src_crs=src.crs,
+            dst_transform=transform,
+            dst_crs=dst_crs,
+            resampling=Resampling.bilinear,
+            num_threads=os.cpu_count() or 1,
+            warp_mem_limit=512
+        )
         
         metadata = {
             'bounds': rasterio.transform.array_bounds(height, width, transform),
@@ -149,10 +209,7 @@ class GeoDataPipeline:
             for operation in operations:
                 if operation == 'ndvi' and data.shape[0] >= 4:
                     # Calculate NDVI (assuming NIR is band 4, Red is band 3)
-                    nir = data[3].astype(float)
-                    red = data[2].astype(float)
-                    ndvi = (nir - red) / (nir + red + 1e-8)
-                    results['ndvi'] = ndvi
+                    results['ndvi'] = self._calculate_ndvi(data[3], data[2])
                     logger.info("Calculated NDVI")
                 
                 elif operation == 'clip':
@@ -172,9 +229,70 @@ class GeoDataPipeline:
             logger.error(f"Error processing satellite imagery: {e}")
             raise
     
-    def convert_to_geojson(self, gdf: gpd.GeoDataFrame) -> Dict[str, Any]:
-        """Convert GeoDataFrame to GeoJSON"""
-        return json.loads(gdf.to_json())
+    def _calculate_ndvi(self, nir: np.ndarray, red: np.ndarray, block_rows: int = 1024) -> np.ndarray:
+        """
+        Calculate NDVI as float32 without full-raster temporaries.
+        Prefers the parallel Numba kernel, then numexpr's multithreaded
+        evaluator, otherwise works through row blocks small enough to stay
+        in cache.
+        """
+        ndvi = np.empty(nir.shape, dtype=np.float32)
+        
+        if ndvi_kernel is not None:
+            return ndvi_kernel(nir, red, ndvi)
+        
+        if ne is not None:
+            ne.evaluate(
+                "(nir - red) / (nir + red + 1e-8)",
+                local_dict={'nir': nir, 'red': red},
+                out=ndvi,
+                casting='unsafe'
+            )
+            return ndvi
+        
+        for start in range(0, nir.shape[0], block_rows):
+            rows = slice(start, start + block_rows)
+            nir_block = nir[rows].astype(np.float32, copy=False)
+            red_block = red[rows].astype(np.float32, copy=False)
+            out = ndvi[rows]
+            
+            den = np.add(nir_block, red_block, dtype=np.float32)
+            np.add(den, 1e-8, out=den)
+            np.subtract(nir_block, red_block, out=out, dtype=np.float32)
+            np.divide(out, den, out=out)
+        
+        return ndvi
+    
+    def convert_to_geojson(self, gdf: gpd.GeoDataFrame, as_bytes: bool = False) -> Union[Dict[str, Any], bytes]:
+        """
+        Convert GeoDataFrame to GeoJSON
+        Geometries are encoded natively by GEOS instead of a to_json/loads
+        round trip. With as_bytes=True the encoded geometries are spliced
+        into the orjson output without ever being parsed.
+        """
+        geometries = shapely.to_geojson(np.asarray(gdf.geometry.array))
+        properties = gdf.drop(columns=gdf.geometry.name)
+        if len(properties.columns):
+            properties = properties.astype(object).where(properties.notna(), None).to_dict('records')
+        else:
+            # to_dict('records') yields no rows at all for a frame without columns
+            properties = [{} for _ in range(len(gdf))]
+        
+        encode = orjson.Fragment if as_bytes else orjson.loads
+        features = [
+            {
+                'id': str(index),
+                'type': 'Feature',
+                'properties': props,
+                'geometry': encode(geometry) if geometry is not None else None
+            }
+            for index, props, geometry in zip(gdf.index, properties, geometries)
+        ]
+        collection = {'type': 'FeatureCollection', 'features': features}
+        
+        if as_bytes:
+            return orjson.dumps(collection, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY)
+        return collection
     
     def spatial_join(
         self,
@@ -195,13 +313,32 @@ class GeoDataPipeline:
     def buffer_analysis(
         self,
         gdf: gpd.GeoDataFrame,
-        distance: float
+        distance: float,
+        chunk_size: int = 10000
     ) -> gpd.GeoDataFrame:
-        """Create buffer around geometries"""
+        """
+        Create buffer around geometries
+        Uses Shapely 2.0's vectorized GEOS calls; large frames are split into
+        chunks buffered in parallel threads, since GEOS releases the GIL
+        """
         try:
             logger.info(f"Creating buffer with distance {distance}")
+            geoms = np.asarray(gdf.geometry.array)
+            # GeoSeries.buffer's default resolution, so results match it exactly
+            quad_segs = 16
+            
+            if len(geoms) > chunk_size:
+                chunks = [geoms[i:i + chunk_size] for i in range(0, len(geoms), chunk_size)]
+                with ThreadPoolExecutor() as executor:
+                    buffered = np.concatenate(list(executor.map(
+                        lambda chunk: shapely.buffer(chunk, distance, quad_segs=quad_segs),
+                        chunks
+                    )))
+            else:
+                buffered = shapely.buffer(geoms, distance, quad_segs=quad_segs)
+            
             gdf_buffered = gdf.copy()
-            gdf_buffered['geometry'] = gdf.geometry.buffer(distance)
+            gdf_buffered['geometry'] = gpd.GeoSeries(buffered, index=gdf.index, crs=gdf.crs)
             return gdf_buffered
         except Exception as e:
             logger.error(f"Error in buffer analysis: {e}")
@@ -209,10 +346,12 @@ class GeoDataPipeline:
     
     def calculate_statistics(self, gdf: gpd.GeoDataFrame) -> Dict[str, Any]:
         """Calculate basic statistics for GeoDataFrame"""
+        # One vectorized GEOS call shared by both aggregates
+        areas = pd.Series(shapely.area(np.asarray(gdf.geometry.array)))
         stats = {
             'feature_count': len(gdf),
-            'total_area': gdf.geometry.area.sum(),
-            'mean_area': gdf.geometry.area.mean(),
+            'total_area': areas.sum(),
+            'mean_area': areas.mean(),
             'bounds': gdf.total_bounds.tolist(),
             'crs': str(gdf.crs)
         }
@@ -229,8 +368,57 @@ class ExternalAPIIntegrator:
             'openweather': os.getenv('OPENWEATHER_KEY', ''),
             'usgs': os.getenv('USGS_KEY', '')
         }
+        self.client: Optional[httpx.AsyncClient] = None
+    
+    async def startup(self):
+        """Open the shared HTTP/2 client and its connection pool"""
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                timeout=10.0
+            )
     
-    def fetch_nasa_earthdata(
+    async def shutdown(self):
+        """Close the shared HTTP client"""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+    
+    async def __aenter__(self):
+        await self.startup()
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.shutdown()
+    
+    async def fetch_all(
+        self,
+        dataset: str,
+        bbox: tuple,
+        lat: float,
+        lon: float,
+        start_date: str,
+        end_date: str
+    ) -> Dict[str, Any]:
+        """
+        Fetch NASA, Sentinel, weather and USGS data concurrently
+        """
+        nasa, sentinel, weather, elevation = await asyncio.gather(
+            self.fetch_nasa_earthdata(dataset, bbox, start_date, end_date),
+            self.fetch_sentinel_imagery(bbox, start_date),
+            self.fetch_weather_data(lat, lon, start_date),
+            self.fetch_usgs_elevation(bbox)
+        )
+        
+        return {
+            'nasa_earthdata': nasa,
+            'sentinel': sentinel,
+            'weather': weather,
+            'elevation': elevation
+        }
+    
+    async def fetch_nasa_earthdata(
         self,
         dataset: str,
         bbox: tuple,
@@ -259,7 +447,7 @@ class ExternalAPIIntegrator:
             logger.error(f"Error fetching NASA data: {e}")
             raise
     
-    def fetch_sentinel_imagery(
+    async def fetch_sentinel_imagery(
         self,
         bbox: tuple,
         date: str,
@@ -284,7 +472,7 @@ class ExternalAPIIntegrator:
             logger.error(f"Error fetching Sentinel data: {e}")
             raise
     
-    def fetch_weather_data(
+    async def fetch_weather_data(
         self,
         lat: float,
         lon: float,
@@ -306,7 +494,10 @@ class ExternalAPIIntegrator:
                 'appid': api_key
             }
             
-            response = requests.get(url, params=params)
+            if self.client is None:
+                await self.startup()
+            
+            response = await self.client.get(url, params=params)
             response.raise_for_status()
             
             return response.json()
@@ -315,7 +506,7 @@ class ExternalAPIIntegrator:
             logger.error(f"Error fetching weather data: {e}")
             return {}
     
-    def fetch_usgs_elevation(
+    async def fetch_usgs_elevation(
         self,
         bbox: tuple
     ) -> Dict[str, Any]:
@@ -338,14 +529,18 @@ class ExternalAPIIntegrator:
             raise
 
 
+async def _fetch_example_weather():
+    async with ExternalAPIIntegrator() as api_integrator:
+        return await api_integrator.fetch_weather_data(40.7128, -74.0060)
+
+
 # Example usage
 if __name__ == "__main__":
     pipeline = GeoDataPipeline()
-    api_integrator = ExternalAPIIntegrator()
     
     logger.info("Geospatial Data Pipeline initialized")
     
     # Example: Fetch weather data
-    weather = api_integrator.fetch_weather_data(40.7128, -74.0060)
+    weather = asyncio.run(_fetch_example_weather())
     if weather:
         logger.info(f"Weather data: {weather.get('weather', [])}")
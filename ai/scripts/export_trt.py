@@ -0,0 +1,84 @@
+"""
+Export the vision models to TensorRT for GPU serving
+
+Compiles the eager models with Torch-TensorRT (FP16 kernels) and saves
+them under the filename each wrapper's export_path() derives from its
+config and engine input shapes, where ai_models.load_exported_model picks
+them up.
+Run from the ai/ directory on a machine with the target GPU:
+
+    python -m scripts.export_trt --models detector segmentation
+
+Requires torch-tensorrt, which is not in the requirements files because
+it only ships CUDA builds. Install the release matching the installed
+torch version (pip install torch-tensorrt) on the export machine and on
+the GPU servers that load the engines.
+"""
+
+import argparse
+import logging
+from pathlib import Path
+
+import torch
+import torch_tensorrt
+
+from models.ai_models import EXPORTED_MODEL_DIR, ModelFactory
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EXPORTABLE_MODELS = ('detector', 'segmentation', 'feature_extractor')
+
+
+def export_model(model_type: str, output_dir: Path, workspace_size: int) -> Path:
+    """Compile one model with Torch-TensorRT and save it as TorchScript"""
+    # Build from the eager model, never from an engine exported earlier
+    wrapper = ModelFactory.create_model(model_type, device='cuda', use_exported=False, keep_eager_model=True)
+    min_shape, opt_shape, max_shape = wrapper.engine_input_shapes()
+    
+    trt_input = torch_tensorrt.Input(
+        min_shape=min_shape,
+        opt_shape=opt_shape,
+        max_shape=max_shape,
+        dtype=torch.float
+    )
+    # The detector takes a list of images; ops TensorRT cannot handle
+    # (NMS, ROI pooling) stay in TorchScript
+    inputs = {'input_signature': ([trt_input],)} if model_type == 'detector' else {'inputs': [trt_input]}
+    
+    trt_module = torch_tensorrt.compile(
+        wrapper.eager_model,
+        ir='torchscript',
+        enabled_precisions={torch.half},
+        workspace_size=workspace_size,
+        require_full_compilation=False,
+        **inputs
+    )
+    
+    path = output_dir / wrapper.export_path().name
+    torch.jit.save(trt_module, str(path))
+    logger.info(f"Saved TensorRT {model_type} to {path}")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--models', nargs='+', choices=EXPORTABLE_MODELS, default=list(EXPORTABLE_MODELS))
+    parser.add_argument('--output-dir', type=Path, default=EXPORTED_MODEL_DIR)
+    parser.add_argument('--workspace-size', type=int, default=1 << 30)
+    args = parser.parse_args()
+    
+    if not torch.cuda.is_available():
+        raise SystemExit("TensorRT export requires a CUDA device")
+    
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    
+    for model_type in args.models:
+        try:
+            export_model(model_type, args.output_dir, args.workspace_size)
+        except Exception as e:
+            logger.error(f"Failed to export {model_type}: {e}")
+
+
+if __name__ == "__main__":
+    main()
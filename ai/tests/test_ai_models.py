@@ -0,0 +1,16 @@
+import torch
+
+from models.ai_models import TimeSeriesPredictor
+
+
+def test_timeseries_model_is_scripted():
+    ts = TimeSeriesPredictor(device='cpu')
+    assert isinstance(ts.model, torch.jit.ScriptModule)
+
+
+def test_timeseries_predict_matches_predict_many():
+    ts = TimeSeriesPredictor(input_size=4, seq_len=6, device='cpu')
+    sequences = torch.rand(3, 6, 4)
+    batch = ts.predict_many(sequences)
+    assert batch.shape == (3,)
+    assert abs(ts.predict(sequences[1]) - float(batch[1])) < 1e-5
@@ -0,0 +1,54 @@
+import json
+
+import numpy as np
+import orjson
+import pytest
+import shapely
+
+gpd = pytest.importorskip("geopandas")
+pytest.importorskip("osgeo")  # data_pipeline needs the GDAL bindings
+
+from scripts.data_pipeline import GeoDataPipeline
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    return GeoDataPipeline(output_dir=str(tmp_path))
+
+
+def _features(collection):
+    return [
+        {key: feature[key] for key in ('id', 'type', 'properties', 'geometry')}
+        for feature in collection['features']
+    ]
+
+
+def _assert_matches_to_json(pipeline, gdf):
+    expected = _features(json.loads(gdf.to_json()))
+    assert _features(pipeline.convert_to_geojson(gdf)) == expected
+    assert _features(orjson.loads(pipeline.convert_to_geojson(gdf, as_bytes=True))) == expected
+
+
+def test_convert_to_geojson_geometry_only(pipeline):
+    gdf = gpd.GeoDataFrame(geometry=[shapely.Point(0, 0), shapely.Point(1, 1)])
+    collection = pipeline.convert_to_geojson(gdf)
+    assert len(collection['features']) == 2
+    assert all(feature['properties'] == {} for feature in collection['features'])
+    _assert_matches_to_json(pipeline, gdf)
+
+
+def test_convert_to_geojson_missing_geometries_and_values(pipeline):
+    gdf = gpd.GeoDataFrame(
+        {'value': [1.0, np.nan, 3.0], 'name': ['a', None, 'c']},
+        geometry=[shapely.Point(0, 0), None, shapely.box(0, 0, 1, 1)]
+    )
+    collection = pipeline.convert_to_geojson(gdf)
+    assert collection['features'][1]['geometry'] is None
+    assert collection['features'][1]['properties'] == {'value': None, 'name': None}
+    _assert_matches_to_json(pipeline, gdf)
+
+
+def test_convert_to_geojson_all_geometries_missing(pipeline):
+    gdf = gpd.GeoDataFrame(geometry=[None, None])
+    assert [f['geometry'] for f in pipeline.convert_to_geojson(gdf)['features']] == [None, None]
+    _assert_matches_to_json(pipeline, gdf)